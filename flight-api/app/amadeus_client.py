@@ -1,10 +1,19 @@
 """
 Amadeus API クライアント
 """
+import asyncio
 import os
+import time
 import httpx
-from typing import Optional, Dict, Any
-from datetime import datetime, timedelta
+from collections import OrderedDict
+from typing import Optional, Dict, Any, List, Tuple, Union
+
+
+# 空港情報キャッシュの最大件数
+AIRPORT_CACHE_SIZE = 512
+
+# 複数フライトのステータスを一括取得する際の同時リクエスト数
+STATUS_LOOKUP_CONCURRENCY = 10
 
 
 class AmadeusClient:
@@ -17,28 +26,54 @@ class AmadeusClient:
         self.base_url = "https://api.amadeus.com"
         self.token = None
         self.token_expires_at = None
+        # トークン更新が同時に複数走らないようにするためのロック
+        self._token_lock = asyncio.Lock()
+        # 空港情報はほぼ不変なので、IATAコードごとにLRUキャッシュする
+        self._airport_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._airport_locks: Dict[str, asyncio.Lock] = {}
+        # 接続を使い回すため、HTTPクライアントはインスタンスで共有する
+        self._client = httpx.AsyncClient(
+            base_url=self.base_url,
+            timeout=30.0,
+            limits=httpx.Limits(max_keepalive_connections=20, max_connections=100)
+        )
+    
+    async def aclose(self):
+        """共有HTTPクライアントをクローズ"""
+        await self._client.aclose()
+    
+    def _has_valid_token(self) -> bool:
+        """キャッシュ済みトークンが有効期限内かどうか"""
+        return (
+            self.token is not None
+            and self.token_expires_at is not None
+            and time.monotonic() < self.token_expires_at
+        )
     
     async def _get_token(self) -> str:
         """OAuth2トークンを取得"""
-        if self.token and self.token_expires_at and datetime.now() < self.token_expires_at:
+        if self._has_valid_token():
             return self.token
         
-        url = f"{self.base_url}/v1/security/oauth2/token"
-        data = {
-            "grant_type": "client_credentials",
-            "client_id": self.api_key,
-            "client_secret": self.api_secret
-        }
-        
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.post(url, data=data)
+        async with self._token_lock:
+            # ロック待ちの間に他のリクエストが更新済みならそれを使う
+            if self._has_valid_token():
+                return self.token
+            
+            data = {
+                "grant_type": "client_credentials",
+                "client_id": self.api_key,
+                "client_secret": self.api_secret
+            }
+            
+            response = await self._client.post("/v1/security/oauth2/token", data=data)
             response.raise_for_status()
             
             result = response.json()
             self.token = result["access_token"]
             # トークンの有効期限を設定（少し余裕を持たせる）
             expires_in = result.get("expires_in", 1799)
-            self.token_expires_at = datetime.now() + timedelta(seconds=expires_in - 60)
+            self.token_expires_at = time.monotonic() + expires_in - 60
             
             return self.token
     
@@ -63,7 +98,6 @@ class AmadeusClient:
         """
         token = await self._get_token()
         
-        url = f"{self.base_url}/v2/schedule/flights"
         params = {
             "carrierCode": carrier_code,
             "flightNumber": flight_number,
@@ -74,10 +108,35 @@ class AmadeusClient:
         
         headers = {"Authorization": f"Bearer {token}"}
         
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.get(url, params=params, headers=headers)
-            response.raise_for_status()
-            return response.json()
+        response = await self._client.get("/v2/schedule/flights", params=params, headers=headers)
+        response.raise_for_status()
+        return response.json()
+    
+    async def get_flight_statuses(
+        self,
+        flights: List[Tuple[str, str, str]],
+        concurrency: int = STATUS_LOOKUP_CONCURRENCY
+    ) -> List[Union[Dict[str, Any], BaseException]]:
+        """
+        複数フライトのステータスを並行して取得
+        
+        Args:
+            flights: (航空会社コード, フライト番号, 出発予定日) のリスト
+            concurrency: 同時に実行するリクエスト数の上限
+        
+        Returns:
+            各フライトのステータス情報（入力と同じ順序）。失敗したものは例外オブジェクト
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        async def fetch(flight: Tuple[str, str, str]) -> Dict[str, Any]:
+            async with semaphore:
+                return await self.get_flight_status(*flight)
+        
+        return await asyncio.gather(
+            *(fetch(flight) for flight in flights),
+            return_exceptions=True
+        )
     
     async def get_flight_order(self, flight_order_id: str) -> Dict[str, Any]:
         """
@@ -91,13 +150,14 @@ class AmadeusClient:
         """
         token = await self._get_token()
         
-        url = f"{self.base_url}/v1/booking/flight-orders/{flight_order_id}"
         headers = {"Authorization": f"Bearer {token}"}
         
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.get(url, headers=headers)
-            response.raise_for_status()
-            return response.json()
+        response = await self._client.get(
+            f"/v1/booking/flight-orders/{flight_order_id}",
+            headers=headers
+        )
+        response.raise_for_status()
+        return response.json()
     
     async def search_airport(self, iata_code: str) -> Optional[Dict[str, Any]]:
         """
@@ -109,9 +169,36 @@ class AmadeusClient:
         Returns:
             空港情報（タイムゾーンオフセット含む）
         """
+        key = iata_code.upper()
+        if key in self._airport_cache:
+            self._airport_cache.move_to_end(key)
+            return self._airport_cache[key]
+        
+        # 同じコードへの同時問い合わせは1回にまとめる
+        lock = self._airport_locks.setdefault(key, asyncio.Lock())
+        try:
+            async with lock:
+                if key in self._airport_cache:
+                    self._airport_cache.move_to_end(key)
+                    return self._airport_cache[key]
+                
+                location = await self._fetch_airport(key)
+                
+                # 見つからなかったコードはキャッシュしない（TimezoneManagerのネガティブキャッシュに任せる）
+                if location is not None:
+                    self._airport_cache[key] = location
+                    if len(self._airport_cache) > AIRPORT_CACHE_SIZE:
+                        self._airport_cache.popitem(last=False)
+                
+                return location
+        finally:
+            if not lock.locked():
+                self._airport_locks.pop(key, None)
+    
+    async def _fetch_airport(self, iata_code: str) -> Optional[Dict[str, Any]]:
+        """Airport City Search APIを呼び出す（キャッシュなし）"""
         token = await self._get_token()
         
-        url = f"{self.base_url}/v1/reference-data/locations"
         params = {
             "subType": "AIRPORT",
             "keyword": iata_code,
@@ -119,12 +206,15 @@ class AmadeusClient:
         }
         headers = {"Authorization": f"Bearer {token}"}
         
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.get(url, params=params, headers=headers)
-            response.raise_for_status()
-            
-            data = response.json()
-            if data.get("data") and len(data["data"]) > 0:
-                return data["data"][0]
-            
-            return None
+        response = await self._client.get(
+            "/v1/reference-data/locations",
+            params=params,
+            headers=headers
+        )
+        response.raise_for_status()
+        
+        data = response.json()
+        if data.get("data") and len(data["data"]) > 0:
+            return data["data"][0]
+        
+        return None
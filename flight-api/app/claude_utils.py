@@ -0,0 +1,7 @@
+"""
+Claude API 共通ユーティリティ
+"""
+import re
+
+# Claudeのレスポンスからマークダウンのコードブロックを除去するパターン
+FENCE_RE = re.compile(r"^```(?:json)?\s*\n(.*?)\n```\s*$", re.DOTALL)
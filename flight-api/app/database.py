@@ -12,8 +12,23 @@ POSTGRES_DB = os.getenv("FLIGHT_DB", "flight_db")
 # 接続文字列
 DATABASE_URL = f"postgresql+asyncpg://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_HOST}:{POSTGRES_PORT}/{POSTGRES_DB}"
 
+# コネクションプール設定
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "20"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+
+# SQLログ出力（デバッグ時のみ SQL_ECHO=1 で有効化）
+SQL_ECHO = os.getenv("SQL_ECHO", "").lower() in ("1", "true")
+
 # エンジンとセッション
-engine = create_async_engine(DATABASE_URL, echo=True)
+engine = create_async_engine(
+    DATABASE_URL,
+    echo=SQL_ECHO,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_recycle=DB_POOL_RECYCLE,
+    pool_pre_ping=True
+)
 async_session_maker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
 Base = declarative_base()
@@ -22,6 +37,13 @@ async def get_db():
     async with async_session_maker() as session:
         yield session
 
+def _create_missing_indexes(sync_conn):
+    """既存テーブルに後から追加したインデックスを作成（create_allはテーブル作成時しか作らない）"""
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(sync_conn, checkfirst=True)
+
 async def init_db():
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(_create_missing_indexes)
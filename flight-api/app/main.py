@@ -1,20 +1,27 @@
 from fastapi import FastAPI, HTTPException, status, Depends, UploadFile, File
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, Response
+from fastapi.middleware.gzip import GZipMiddleware
+from starlette.middleware.gzip import DEFAULT_EXCLUDED_CONTENT_TYPES
+from fastapi.responses import FileResponse, RedirectResponse, Response
+from fastapi.staticfiles import StaticFiles
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, delete as sql_delete
+from sqlalchemy import select, insert, update, delete as sql_delete, cast, func, literal, literal_column, Text
+from sqlalchemy.dialects.postgresql import aggregate_order_by
 from typing import List, Optional
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from datetime import datetime, date, time
 from decimal import Decimal
+from itertools import chain
 import os
-import json
+import asyncio
 import shutil
 import base64
 import anthropic
+import orjson
 
 from .database import get_db, init_db
 from .models import Flight
+from .claude_utils import FENCE_RE
 
 app = FastAPI(
     title="フライト予約管理API",
@@ -31,8 +38,59 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# レスポンス圧縮（1KB未満は圧縮しない）
+# PDFは圧縮済みのデータを含むため圧縮対象から外す
+app.add_middleware(
+    GZipMiddleware,
+    minimum_size=1024,
+    compresslevel=5,
+    exclude_content_types=(*DEFAULT_EXCLUDED_CONTENT_TYPES, "application/pdf"),
+)
+
+# パス設定（リクエストごとに再計算しないようモジュールロード時に確定）
+APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PDF_DIR = os.path.join(APP_ROOT, "pdfs")
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+ADMIN_HTML_PATH = os.path.join(STATIC_DIR, "admin.html")
+FLIGHT_STATUS_HTML_PATH = os.path.join(STATIC_DIR, "flight-status.html")
+
+os.makedirs(PDF_DIR, exist_ok=True)
+
+# アップロードファイル書き込み時のバッファサイズ（1MB）
+UPLOAD_CHUNK_SIZE = 1 << 20
+
+def _save_upload_file(src, dest_path: str):
+    """アップロードファイルをディスクへ書き込む（スレッドプールで実行）"""
+    with open(dest_path, "wb") as buffer:
+        shutil.copyfileobj(src, buffer, UPLOAD_CHUNK_SIZE)
+
+# Base64エンコード時の読み込み単位（3の倍数ならチャンク単位でパディングが発生しない）
+BASE64_CHUNK_SIZE = 3 * 65536
+
+async def _read_as_base64(file: UploadFile) -> str:
+    """アップロードファイルを少しずつ読み込みながらBase64エンコード"""
+    encoded = bytearray()
+    while chunk := await file.read(BASE64_CHUNK_SIZE):
+        encoded += base64.standard_b64encode(chunk)
+    return encoded.decode("ascii")
+
+# Claude APIクライアント（接続プールを共有するため初回利用時に1つだけ生成）
+_anthropic_client: Optional[anthropic.AsyncAnthropic] = None
+
+def get_anthropic_client(api_key: str) -> anthropic.AsyncAnthropic:
+    """共有のClaude APIクライアントを取得"""
+    global _anthropic_client
+    if _anthropic_client is None:
+        _anthropic_client = anthropic.AsyncAnthropic(api_key=api_key)
+    return _anthropic_client
+
 # Pydanticモデル
+# リクエストボディ用モデルは読み取り専用で使うため、未知のフィールドは無視し変更不可にする
+REQUEST_MODEL_CONFIG = ConfigDict(extra="ignore", frozen=True)
+
 class FlightCreate(BaseModel):
+    model_config = REQUEST_MODEL_CONFIG
+    
     flight_date: date
     departure_airport: str
     arrival_airport: str
@@ -48,6 +106,8 @@ class FlightCreate(BaseModel):
     currency: Optional[str] = "JPY"
 
 class FlightUpdate(BaseModel):
+    model_config = REQUEST_MODEL_CONFIG
+    
     flight_date: Optional[date] = None
     departure_airport: Optional[str] = None
     arrival_airport: Optional[str] = None
@@ -80,8 +140,26 @@ class FlightResponse(BaseModel):
     created_at: datetime
     updated_at: datetime
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
+
+# 読み取り専用の一覧系クエリで取得するカラム（ORMオブジェクトを生成せずタプルで受け取る）
+FLIGHT_RESPONSE_COLUMNS = tuple(getattr(Flight, name) for name in FlightResponse.model_fields)
+
+# エクスポート用のフライト配列（日付降順、0件なら空配列）をPostgreSQLのJSON関数で生成する式
+EXPORT_FLIGHTS_JSON = func.coalesce(
+    func.json_agg(
+        aggregate_order_by(
+            func.json_build_object(
+                *chain.from_iterable(
+                    (literal_column(f"'{column.key}'"), column)
+                    for column in FLIGHT_RESPONSE_COLUMNS
+                )
+            ),
+            Flight.flight_date.desc()
+        )
+    ),
+    literal_column("'[]'::json")
+)
 
 # エクスポート・インポート機能のPydanticモデル
 class ExportData(BaseModel):
@@ -92,6 +170,8 @@ class ExportData(BaseModel):
 
 class ImportData(BaseModel):
     """インポートデータモデル"""
+    model_config = REQUEST_MODEL_CONFIG
+    
     version: Optional[str] = None
     exportDate: Optional[str] = None
     flights: List[dict]
@@ -109,6 +189,24 @@ class PDFImportResponse(BaseModel):
     message: str
     flights: List[dict]
 
+def _json_default(obj):
+    """orjsonが直接扱えない型の変換（DecimalはPydanticと同じく文字列にする）"""
+    if isinstance(obj, Decimal):
+        return str(obj)
+    raise TypeError
+
+def encode_flight_rows(rows) -> bytes:
+    """DBの行をFlightResponseと同じ形のJSONにエンコード（Pydanticの検証を経由しない）"""
+    return orjson.dumps([row._asdict() for row in rows], default=_json_default)
+
+class ImmutableStaticFiles(StaticFiles):
+    """ファイル名にタイムスタンプを含み内容が変わらないファイル向けのStaticFiles"""
+    
+    def file_response(self, *args, **kwargs):
+        response = super().file_response(*args, **kwargs)
+        response.headers.setdefault("Cache-Control", "public, max-age=31536000, immutable")
+        return response
+
 @app.on_event("startup")
 async def startup_db_client():
     """アプリケーション起動時にデータベースを初期化"""
@@ -123,56 +221,34 @@ async def root():
 async def get_flights(db: AsyncSession = Depends(get_db)):
     """フライト一覧を取得（日付降順）"""
     result = await db.execute(
-        select(Flight).order_by(Flight.flight_date.desc())
+        select(*FLIGHT_RESPONSE_COLUMNS).order_by(Flight.flight_date.desc())
     )
-    flights = result.scalars().all()
-    return flights
+    # DB由来の値は型が確定しているため、response_modelはドキュメント用途のみとし直接エンコードする
+    return Response(content=encode_flight_rows(result.all()), media_type="application/json")
 
 @app.get("/api/flights/export")
 async def export_flights(db: AsyncSession = Depends(get_db)):
     """フライトをJSON形式でエクスポート（ダウンロード）"""
     try:
-        # 全てのフライトを取得
-        result = await db.execute(
-            select(Flight).order_by(Flight.flight_date.desc())
-        )
-        flights = result.scalars().all()
+        now = datetime.utcnow()
         
-        # エクスポートデータを構築
-        export_data = {
-            "version": "1.0",
-            "exportDate": datetime.utcnow().isoformat() + "Z",
-            "flights": [
-                {
-                    "id": f.id,
-                    "flight_date": f.flight_date.isoformat(),
-                    "departure_airport": f.departure_airport,
-                    "arrival_airport": f.arrival_airport,
-                    "reservation_number": f.reservation_number,
-                    "flight_number": f.flight_number,
-                    "eticket_pdf_path": f.eticket_pdf_path,
-                    "seat_number": f.seat_number,
-                    "status": f.status,
-                    "departure_time": f.departure_time.isoformat() if f.departure_time else None,
-                    "arrival_time": f.arrival_time.isoformat() if f.arrival_time else None,
-                    "notes": f.notes,
-                    "payment_amount": float(f.payment_amount) if f.payment_amount else None,
-                    "currency": f.currency,
-                    "created_at": f.created_at.isoformat(),
-                    "updated_at": f.updated_at.isoformat()
-                }
-                for f in flights
-            ]
-        }
+        # エクスポートデータのJSONはPostgreSQL側で組み立てて文字列のまま受け取る
+        stmt = select(
+            cast(
+                func.json_build_object(
+                    literal_column("'version'"), literal_column("'1.0'"),
+                    literal_column("'exportDate'"), literal(now.isoformat() + "Z"),
+                    literal_column("'flights'"), EXPORT_FLIGHTS_JSON
+                ),
+                Text
+            )
+        ).select_from(Flight)
+        json_content = (await db.execute(stmt)).scalar_one()
         
         # ファイル名生成（YYYYMMDD_HHMMSS形式）
-        now = datetime.utcnow()
         timestamp = now.strftime("%Y%m%d_%H%M%S")
         filename = f"flights_{timestamp}.json"
         
-        # JSONレスポンスを作成
-        json_content = json.dumps(export_data, ensure_ascii=False, indent=2)
-        
         return Response(
             content=json_content,
             media_type="application/json",
@@ -212,28 +288,30 @@ async def import_flights(import_data: ImportData, db: AsyncSession = Depends(get
         # 既存データを全削除
         delete_result = await db.execute(sql_delete(Flight))
         deleted_count = delete_result.rowcount
-        await db.flush()
         
-        # 新しいデータをインポート
-        imported_count = 0
-        for item in import_data.flights:
-            db_flight = Flight(
-                flight_date=item["flight_date"],
-                departure_airport=item["departure_airport"],
-                arrival_airport=item["arrival_airport"],
-                reservation_number=item["reservation_number"],
-                flight_number=item["flight_number"],
-                eticket_pdf_path=item.get("eticket_pdf_path"),
-                seat_number=item.get("seat_number"),
-                status=item.get("status", "Reserved"),
-                departure_time=item.get("departure_time"),
-                arrival_time=item.get("arrival_time"),
-                notes=item.get("notes"),
-                payment_amount=item.get("payment_amount"),
-                currency=item.get("currency", "JPY")
-            )
-            db.add(db_flight)
-            imported_count += 1
+        # 新しいデータを一括インポート（executemany）
+        rows = [
+            {
+                "flight_date": item["flight_date"],
+                "departure_airport": item["departure_airport"],
+                "arrival_airport": item["arrival_airport"],
+                "reservation_number": item["reservation_number"],
+                "flight_number": item["flight_number"],
+                "eticket_pdf_path": item.get("eticket_pdf_path"),
+                "seat_number": item.get("seat_number"),
+                "status": item.get("status", "Reserved"),
+                "departure_time": item.get("departure_time"),
+                "arrival_time": item.get("arrival_time"),
+                "notes": item.get("notes"),
+                "payment_amount": item.get("payment_amount"),
+                "currency": item.get("currency", "JPY")
+            }
+            for item in import_data.flights
+        ]
+        if rows:
+            # 空リストを渡すとDEFAULT VALUESの1行INSERTになるため、0件なら実行しない
+            await db.execute(insert(Flight), rows)
+        imported_count = len(rows)
         
         # コミット
         await db.commit()
@@ -261,17 +339,18 @@ async def import_flights(import_data: ImportData, db: AsyncSession = Depends(get
 async def get_flight(flight_id: int, db: AsyncSession = Depends(get_db)):
     """特定のフライトを取得"""
     result = await db.execute(
-        select(Flight).where(Flight.id == flight_id)
+        select(*FLIGHT_RESPONSE_COLUMNS).where(Flight.id == flight_id)
     )
-    flight = result.scalar_one_or_none()
+    row = result.first()
     
-    if flight is None:
+    if row is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="フライトが見つかりません"
         )
     
-    return flight
+    content = orjson.dumps(row._asdict(), default=_json_default)
+    return Response(content=content, media_type="application/json")
 
 @app.post("/api/flights", response_model=FlightResponse, status_code=status.HTTP_201_CREATED)
 async def create_flight(flight: FlightCreate, db: AsyncSession = Depends(get_db)):
@@ -304,9 +383,19 @@ async def update_flight(
     db: AsyncSession = Depends(get_db)
 ):
     """フライトを更新"""
-    result = await db.execute(
-        select(Flight).where(Flight.id == flight_id)
-    )
+    # 更新するフィールドのみを適用
+    update_data = flight.model_dump(exclude_unset=True)
+    if update_data:
+        stmt = (
+            update(Flight)
+            .where(Flight.id == flight_id)
+            .values(**update_data)
+            .returning(Flight)
+        )
+    else:
+        stmt = select(Flight).where(Flight.id == flight_id)
+    
+    result = await db.execute(stmt)
     db_flight = result.scalar_one_or_none()
     
     if db_flight is None:
@@ -315,13 +404,7 @@ async def update_flight(
             detail="フライトが見つかりません"
         )
     
-    # 更新するフィールドのみを適用
-    update_data = flight.model_dump(exclude_unset=True)
-    for key, value in update_data.items():
-        setattr(db_flight, key, value)
-    
     await db.commit()
-    await db.refresh(db_flight)
     
     return db_flight
 
@@ -329,19 +412,15 @@ async def update_flight(
 async def delete_flight(flight_id: int, db: AsyncSession = Depends(get_db)):
     """フライトを削除"""
     result = await db.execute(
-        select(Flight).where(Flight.id == flight_id)
+        sql_delete(Flight).where(Flight.id == flight_id).returning(Flight.id)
     )
-    db_flight = result.scalar_one_or_none()
     
-    if db_flight is None:
+    if result.scalar_one_or_none() is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="フライトが見つかりません"
         )
     
-    await db.execute(
-        sql_delete(Flight).where(Flight.id == flight_id)
-    )
     await db.commit()
     
     return None
@@ -384,24 +463,18 @@ async def upload_eticket(
     # 古いPDFファイルのパスを取得（削除用）
     old_pdf_path = None
     if related_flights and related_flights[0].eticket_pdf_path:
-        old_pdf_path = os.path.join(
-            os.path.dirname(os.path.dirname(__file__)),
-            related_flights[0].eticket_pdf_path
-        )
+        old_pdf_path = os.path.join(APP_ROOT, related_flights[0].eticket_pdf_path)
     
     # ファイル名生成（予約番号ベース）
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     safe_filename = f"eticket_{reservation_number}_{timestamp}.pdf"
     file_path = os.path.join("pdfs", safe_filename)
-    full_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), file_path)
-    
-    # ディレクトリが存在しない場合は作成
-    os.makedirs(os.path.dirname(full_path), exist_ok=True)
+    full_path = os.path.join(PDF_DIR, safe_filename)
     
     # ファイルを保存
     try:
-        with open(full_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        # イベントループをブロックしないよう別スレッドで書き込む
+        await asyncio.to_thread(_save_upload_file, file.file, full_path)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -455,9 +528,8 @@ async def import_from_file(file: UploadFile = File(...)):
     content_type, media_type = supported_formats[file_extension]
     
     try:
-        # ファイルを読み込んでBase64エンコード
-        file_content = await file.read()
-        file_base64 = base64.standard_b64encode(file_content).decode("utf-8")
+        # ファイルを読み込んでBase64エンコード（元データ全体をメモリに載せない）
+        file_base64 = await _read_as_base64(file)
         
         # APIキーを環境変数から取得
         api_key = os.getenv("ANTHROPIC_API_KEY")
@@ -467,8 +539,8 @@ async def import_from_file(file: UploadFile = File(...)):
                 detail="ANTHROPIC_API_KEYが設定されていません"
             )
         
-        # Claude APIクライアントを初期化
-        client = anthropic.Anthropic(api_key=api_key)
+        # Claude APIクライアントを取得
+        client = get_anthropic_client(api_key)
         
         # ファイルタイプに応じてcontentブロックを構築
         if content_type == 'document':
@@ -528,7 +600,7 @@ async def import_from_file(file: UploadFile = File(...)):
 情報が見つからない場合はnullを設定してください。"""
         
         # Claude APIを呼び出し
-        message = client.messages.create(
+        message = await client.messages.create(
             model="claude-haiku-4-5-20251001",
             max_tokens=4096,
             messages=[
@@ -552,12 +624,11 @@ async def import_from_file(file: UploadFile = File(...)):
         try:
             # レスポンスからJSONを抽出（マークダウンのコードブロックを除去）
             json_text = response_text.strip()
-            if json_text.startswith("```"):
-                # コードブロックを除去
-                lines = json_text.split("\n")
-                json_text = "\n".join(lines[1:-1]) if len(lines) > 2 else json_text
+            fence_match = FENCE_RE.match(json_text)
+            if fence_match:
+                json_text = fence_match.group(1)
             
-            flight_data = json.loads(json_text)
+            flight_data = orjson.loads(json_text)
             
             if "flights" not in flight_data or not isinstance(flight_data["flights"], list):
                 raise ValueError("レスポンスに'flights'配列が含まれていません")
@@ -568,7 +639,7 @@ async def import_from_file(file: UploadFile = File(...)):
                 flights=flight_data["flights"]
             )
             
-        except json.JSONDecodeError as e:
+        except orjson.JSONDecodeError as e:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"JSONのパースに失敗しました: {str(e)}\nレスポンス: {response_text}"
@@ -590,84 +661,44 @@ async def import_from_file(file: UploadFile = File(...)):
             detail=f"ファイルの処理中にエラーが発生しました: {str(e)}"
         )
 
-@app.get("/api/pdfs/{filename}")
-async def get_pdf(filename: str):
-    """PDFファイルを取得"""
-    # ファイル名のセキュリティチェック（パストラバーサル対策）
-    if ".." in filename or "/" in filename or "\\" in filename:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="無効なファイル名です"
-        )
-    
-    # PDFファイルのパスを構築
-    pdf_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "pdfs", filename)
-    
-    # ファイルの存在確認
-    if not os.path.exists(pdf_path):
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="PDFファイルが見つかりません"
-        )
-    
-    # PDFファイルを返す（ブラウザでインライン表示）
-    return FileResponse(
-        path=pdf_path,
-        media_type="application/pdf",
-        headers={"Content-Disposition": f"inline; filename={filename}"}
-    )
+# PDFファイルはStaticFilesで配信（パストラバーサル対策・ETag/Last-Modified付与もStarlette側で行う）
+# アップロードごとに新しいファイル名になるため、ブラウザ側で長期キャッシュさせる
+app.mount("/api/pdfs", ImmutableStaticFiles(directory=PDF_DIR), name="pdfs")
 
 @app.get("/api/flights/{flight_id}/eticket")
 async def get_flight_eticket(flight_id: int, db: AsyncSession = Depends(get_db)):
     """フライトに紐づくEチケットPDFを取得"""
     # フライトの存在確認
     result = await db.execute(
-        select(Flight).where(Flight.id == flight_id)
+        select(Flight.eticket_pdf_path).where(Flight.id == flight_id)
     )
-    db_flight = result.scalar_one_or_none()
+    row = result.first()
     
-    if db_flight is None:
+    if row is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="フライトが見つかりません"
         )
     
     # PDFパスの確認
-    if not db_flight.eticket_pdf_path:
+    if not row.eticket_pdf_path:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="このフライトにはEチケットが紐づいていません"
         )
     
-    # PDFファイルのフルパスを構築
-    pdf_full_path = os.path.join(
-        os.path.dirname(os.path.dirname(__file__)),
-        db_flight.eticket_pdf_path
-    )
-    
-    # ファイルの存在確認
-    if not os.path.exists(pdf_full_path):
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="PDFファイルが見つかりません"
-        )
-    
-    # ファイル名を抽出
-    filename = os.path.basename(db_flight.eticket_pdf_path)
-    
-    # PDFファイルを返す（ブラウザでインライン表示）
-    return FileResponse(
-        path=pdf_full_path,
-        media_type="application/pdf",
-        headers={"Content-Disposition": f"inline; filename={filename}"}
+    # ファイル本体の配信はStaticFilesに任せる
+    filename = os.path.basename(row.eticket_pdf_path)
+    return RedirectResponse(
+        url=app.url_path_for("pdfs", path=filename),
+        status_code=status.HTTP_307_TEMPORARY_REDIRECT
     )
 
 @app.get("/admin")
 async def admin_page():
     """管理画面を表示"""
-    admin_html_path = os.path.join(os.path.dirname(__file__), "static", "admin.html")
-    if os.path.exists(admin_html_path):
-        return FileResponse(admin_html_path)
+    if os.path.exists(ADMIN_HTML_PATH):
+        return FileResponse(ADMIN_HTML_PATH)
     else:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -683,16 +714,48 @@ import httpx
 amadeus_client = AmadeusClient()
 timezone_manager = TimezoneManager()
 
+# 起動時にタイムゾーンを解決しておく主要空港
+# 現状タイムゾーンを参照するエンドポイントはないため、TIMEZONE_PREWARM=1 のときのみ実行する
+# （ワーカーごとに実行されるため、複数ワーカー構成ではその数だけAPI呼び出しが発生する）
+TIMEZONE_PREWARM = os.getenv("TIMEZONE_PREWARM", "").lower() in ("1", "true")
+PREWARM_AIRPORTS = [
+    "HND", "NRT", "KIX", "ITM", "FUK", "CTS",
+    "ICN", "TPE", "HKG", "SIN", "BKK",
+    "LAX", "SFO", "JFK", "HNL", "LHR", "CDG", "FRA"
+]
+_prewarm_task: Optional[asyncio.Task] = None
+
+@app.on_event("startup")
+async def startup_timezone_manager():
+    """空港タイムゾーンキャッシュの定期書き出しと主要空港の事前解決を開始"""
+    global _prewarm_task
+    timezone_manager.start_flusher()
+    # 起動を待たせないようバックグラウンドで解決する（APIキー未設定なら何もしない）
+    if TIMEZONE_PREWARM and (amadeus_client.api_key or os.getenv("ANTHROPIC_API_KEY")):
+        _prewarm_task = asyncio.create_task(
+            timezone_manager.prewarm(PREWARM_AIRPORTS, amadeus_client)
+        )
+
+@app.on_event("shutdown")
+async def shutdown_api_clients():
+    """アプリケーション終了時にバックグラウンド処理を止め、外部APIクライアントの接続をクローズ"""
+    # クライアントを閉じる前に、それらを使う処理をすべて止める
+    if _prewarm_task is not None and not _prewarm_task.done():
+        _prewarm_task.cancel()
+        try:
+            await _prewarm_task
+        except asyncio.CancelledError:
+            pass
+    await timezone_manager.aclose()
+    await amadeus_client.aclose()
+    if _anthropic_client is not None:
+        await _anthropic_client.close()
+
 @app.get("/flight-status")
 async def flight_status_page():
     """個別フライトステータス確認画面"""
-    status_html_path = os.path.join(
-        os.path.dirname(__file__), 
-        "static", 
-        "flight-status.html"
-    )
-    if os.path.exists(status_html_path):
-        return FileResponse(status_html_path)
+    if os.path.exists(FLIGHT_STATUS_HTML_PATH):
+        return FileResponse(FLIGHT_STATUS_HTML_PATH)
     raise HTTPException(
         status_code=status.HTTP_404_NOT_FOUND, 
         detail="フライトステータス確認画面が見つかりません"
@@ -1,9 +1,13 @@
-from sqlalchemy import Column, Integer, String, Date, Time, Text, TIMESTAMP, Numeric, JSON
+from sqlalchemy import Column, Integer, String, Date, Time, Text, TIMESTAMP, Numeric, JSON, Index
 from sqlalchemy.sql import func
 from app.database import Base
 
 class Flight(Base):
     __tablename__ = "flights"
+    __table_args__ = (
+        # 予約番号での検索（Eチケットのアップロード時）用。先頭列だけの検索にも使われる
+        Index("ix_flights_resnum_date", "reservation_number", "flight_date"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     flight_date = Column(Date, nullable=False)
@@ -1,40 +1,192 @@
 """
 空港タイムゾーン管理モジュール
 """
+import asyncio
 import json
 import os
-from datetime import datetime
-from typing import Optional, Dict
+import time
+import orjson
+from datetime import datetime, timezone
+from typing import Optional, Dict, List
 import anthropic
 
+from .claude_utils import FENCE_RE
+
+def _utc_now_iso() -> str:
+    """現在のUTC時刻をISO 8601形式（末尾Z）で返す"""
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+# Claudeへの問い合わせプロンプト（{code}に空港コードが入る）
+_CLAUDE_PROMPT_TEMPLATE = """空港コード「{code}」のタイムゾーンオフセットを教えてください。
+
+回答は以下のJSON形式のみで返してください（他のテキストは含めないでください）：
+{{
+  "iata_code": "{code}",
+  "city_name": "都市名",
+  "country_code": "国コード（2文字）",
+  "timezone_offset": "+09:00",
+  "timezone_name": "Asia/Tokyo"
+}}
+
+タイムゾーンオフセットは"+HH:MM"または"-HH:MM"の形式で返してください。"""
+
+# 未保存の空港情報をファイルに書き出す間隔（秒）
+FLUSH_INTERVAL = 5.0
+
+# どのAPIでも解決できなかった空港コードを再問い合わせしない期間（秒）
+NEGATIVE_CACHE_TTL = 3600.0
+
 
 class TimezoneManager:
     """空港のタイムゾーン情報を管理"""
     
-    def __init__(self, data_file: str = "data/airport_timezones.json"):
+    def __init__(self, data_file: str = "data/airport_timezones.jsonl"):
         self.data_file = os.path.join(
             os.path.dirname(os.path.dirname(__file__)), 
             data_file
         )
         self.data = self._load_data()
+        # "airports"は_load_dataで必ず用意されるので、参照を保持して直接引く
+        self._airports: Dict[str, Dict] = self.data["airports"]
+        # 未保存の空港情報（flush()でファイル末尾にまとめて追記する）
+        self._pending: List[Dict] = []
+        self._flusher_task: Optional[asyncio.Task] = None
+        # ファイル書き込みを直列化するためのロック
+        self._save_lock = asyncio.Lock()
+        # 解決できなかった空港コード -> 再問い合わせ可能になる時刻（time.monotonic()基準）
+        self._negative: Dict[str, float] = {}
+        # 問い合わせ中の空港コード -> 解決タスク（同じコードの同時問い合わせを1回にまとめる）
+        self._inflight: Dict[str, asyncio.Task] = {}
+        # Claude APIクライアント（接続を使い回すため初回利用時に生成して保持）
+        self._anthropic: Optional[anthropic.AsyncAnthropic] = None
         
     def _load_data(self) -> Dict:
-        """JSONファイルからデータをロード"""
+        """JSON Linesファイルからデータをロード（同じ空港が複数行あれば後の行を優先）"""
+        airports = {}
         if os.path.exists(self.data_file):
-            with open(self.data_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        return {
-            "version": "1.0.0",
-            "last_updated": datetime.utcnow().isoformat() + "Z",
-            "airports": {}
-        }
-    
-    def _save_data(self):
-        """JSONファイルにデータを保存"""
+            # ファイル全体を1回のread()で読み込み、行ごとにパースする
+            with open(self.data_file, 'rb') as f:
+                content = f.read()
+            corrupted = False
+            for line_number, line in enumerate(content.splitlines(), 1):
+                if not line.strip():
+                    continue
+                try:
+                    entry = orjson.loads(line)
+                except orjson.JSONDecodeError as e:
+                    # 追記中のクラッシュなどで途中まで書かれた行は読み飛ばす
+                    print(f"Skipping broken line {line_number} in {self.data_file}: {e}")
+                    corrupted = True
+                    continue
+                iata_code = entry.get("iata_code") if isinstance(entry, dict) else None
+                if not iata_code:
+                    # キーが取れない行はどの空港か分からないため読み飛ばす
+                    print(f"Skipping line {line_number} without iata_code in {self.data_file}")
+                    corrupted = True
+                    continue
+                airports[iata_code] = entry
+            if corrupted:
+                # 壊れた行の後ろに追記が続かないよう、正常な行だけで書き直しておく
+                self._rewrite_on_load(airports)
+            return {"airports": airports}
+        
+        # 旧形式（単一のJSONファイル）があれば読み込んでJSON Linesに変換する
+        legacy_file = os.path.splitext(self.data_file)[0] + ".json"
+        if os.path.exists(legacy_file):
+            with open(legacy_file, 'rb') as f:
+                airports = orjson.loads(f.read()).get("airports", {})
+            # JSON Linesでは各行がキーを持つため、旧形式の辞書キーを書き込んでおく
+            for iata_code, info in airports.items():
+                info["iata_code"] = iata_code
+            self._rewrite_on_load(airports)
+        return {"airports": airports}
+    
+    def _rewrite_on_load(self, airports: Dict[str, Dict]):
+        """ロード時の書き直し（失敗しても起動は止めず、メモリ上のデータで続行する）"""
+        try:
+            self._write_airports(airports)
+        except OSError as e:
+            print(f"Failed to rewrite {self.data_file}: {e}")
+    
+    @staticmethod
+    def _encode_lines(entries) -> bytes:
+        """空港情報をJSON Lines形式のbytesにエンコード"""
+        return b"".join(orjson.dumps(info) + b"\n" for info in entries)
+    
+    def _write_airports(self, airports: Dict[str, Dict]):
+        """全空港情報でJSON Linesファイルを書き直す（一時ファイル経由で置き換える）"""
+        os.makedirs(os.path.dirname(self.data_file), exist_ok=True)
+        content = self._encode_lines(airports.values())
+        # 複数ワーカーが同時に書き直しても衝突しないよう、一時ファイル名にPIDを含める
+        tmp_file = f"{self.data_file}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_file, 'wb') as f:
+                f.write(content)
+            os.replace(tmp_file, self.data_file)
+        except OSError:
+            if os.path.exists(tmp_file):
+                os.remove(tmp_file)
+            raise
+    
+    def _append_airports(self, entries: List[Dict]):
+        """空港情報をJSON Linesファイルの末尾に追記"""
         os.makedirs(os.path.dirname(self.data_file), exist_ok=True)
-        self.data["last_updated"] = datetime.utcnow().isoformat() + "Z"
-        with open(self.data_file, 'w', encoding='utf-8') as f:
-            json.dump(self.data, f, ensure_ascii=False, indent=2)
+        content = self._encode_lines(entries)
+        with open(self.data_file, 'ab') as f:
+            f.write(content)
+    
+    async def flush(self):
+        """未保存の空港情報があればファイルに追記する"""
+        if not self._pending:
+            return
+        entries, self._pending = self._pending, []
+        async with self._save_lock:
+            try:
+                # イベントループをブロックしないよう別スレッドで書き込む
+                await asyncio.to_thread(self._append_airports, entries)
+            except Exception:
+                # 書き込めなかった分は次回のflush()で再試行する
+                self._pending[:0] = entries
+                raise
+    
+    def start_flusher(self, interval: float = FLUSH_INTERVAL):
+        """定期的にflush()するバックグラウンドタスクを開始"""
+        if self._flusher_task is None:
+            self._flusher_task = asyncio.create_task(self._flusher(interval))
+    
+    async def _flusher(self, interval: float):
+        """一定間隔で未保存の空港情報を書き出す"""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"Timezone cache flush error: {e}")
+    
+    async def aclose(self):
+        """バックグラウンドタスクと問い合わせ中の処理を停止し、残りの空港情報を書き出してクライアントを閉じる"""
+        if self._flusher_task is not None:
+            self._flusher_task.cancel()
+            try:
+                await self._flusher_task
+            except asyncio.CancelledError:
+                pass
+            self._flusher_task = None
+        # shieldで保護されている解決タスクはここで明示的に止める
+        inflight = list(self._inflight.values())
+        for task in inflight:
+            task.cancel()
+        await asyncio.gather(*inflight, return_exceptions=True)
+        await self.flush()
+        if self._anthropic is not None:
+            await self._anthropic.close()
+            self._anthropic = None
+    
+    async def compact(self):
+        """重複行を取り除いてファイルを書き直す（メンテナンス用）"""
+        self._pending = []
+        async with self._save_lock:
+            await asyncio.to_thread(self._write_airports, dict(self._airports))
     
     async def get_timezone_offset(
         self, 
@@ -49,6 +201,9 @@ class TimezoneManager:
         2. Amadeus APIで取得してキャッシュ
         3. Claude APIに問い合わせ（フォールバック）
         
+        いずれからも見つからないと返されたコードは一定時間Noneを返す（ネガティブキャッシュ）
+        APIエラーで取得できなかった場合は次の呼び出しで再度問い合わせる
+        
         Args:
             iata_code: 空港のIATAコード（3文字）
             amadeus_client: AmadeusClientのインスタンス
@@ -57,8 +212,28 @@ class TimezoneManager:
             タイムゾーンオフセット（例: "+09:00"）
         """
         # 1. キャッシュチェック
-        if iata_code in self.data.get("airports", {}):
-            return self.data["airports"][iata_code]["timezone_offset"]
+        airport = self._airports.get(iata_code)
+        if airport is not None:
+            return airport["timezone_offset"]
+        
+        retry_at = self._negative.get(iata_code)
+        if retry_at is not None:
+            if time.monotonic() < retry_at:
+                return None
+            del self._negative[iata_code]
+        
+        task = self._inflight.get(iata_code)
+        if task is None:
+            task = asyncio.create_task(self._resolve(iata_code, amadeus_client))
+            self._inflight[iata_code] = task
+            task.add_done_callback(lambda _: self._inflight.pop(iata_code, None))
+        # 呼び出し元がキャンセルされても、待っている他の呼び出し元のタスクは止めない
+        return await asyncio.shield(task)
+    
+    async def _resolve(self, iata_code: str, amadeus_client) -> Optional[str]:
+        """外部APIで空港のタイムゾーンオフセットを解決"""
+        # タイムアウトや5xxなど一時的な失敗があったかどうか
+        failed = False
         
         # 2. Amadeus APIで取得
         try:
@@ -67,6 +242,7 @@ class TimezoneManager:
                 return offset
         except Exception as e:
             print(f"Amadeus API error for {iata_code}: {e}")
+            failed = True
         
         # 3. Claude APIでフォールバック
         try:
@@ -75,9 +251,34 @@ class TimezoneManager:
                 return offset
         except Exception as e:
             print(f"Claude API error for {iata_code}: {e}")
+            failed = True
         
+        # 両方から「見つからない」と返ってきた場合のみネガティブキャッシュする
+        if not failed:
+            self._negative[iata_code] = time.monotonic() + NEGATIVE_CACHE_TTL
         return None
     
+    async def prewarm(self, iata_codes: List[str], amadeus_client):
+        """主要空港のタイムゾーンを並行して解決し、キャッシュしておく"""
+        await asyncio.gather(
+            *(self.get_timezone_offset(code, amadeus_client) for code in iata_codes),
+            return_exceptions=True
+        )
+    
+    def _store_airport(self, iata_code: str, airport_info: Dict):
+        """空港情報をキャッシュに保存（オフセットと取得元が変わらなければ書き込まない）"""
+        prev = self._airports.get(iata_code)
+        if (
+            prev is not None
+            and prev.get("timezone_offset") == airport_info["timezone_offset"]
+            and prev.get("source") == airport_info["source"]
+        ):
+            return
+        # 取得元が返すコードではなく、問い合わせたコードをキーとして保存する
+        airport_info["iata_code"] = iata_code
+        self._airports[iata_code] = airport_info
+        self._pending.append(airport_info)
+    
     async def _fetch_from_amadeus(
         self, 
         iata_code: str,
@@ -96,14 +297,10 @@ class TimezoneManager:
                 "timezone_offset": location.get("timeZoneOffset"),
                 "timezone_name": None,  # Amadeusでは取得不可
                 "source": "amadeus",
-                "updated_at": datetime.utcnow().isoformat() + "Z"
+                "updated_at": _utc_now_iso()
             }
             
-            if "airports" not in self.data:
-                self.data["airports"] = {}
-            
-            self.data["airports"][iata_code] = airport_info
-            self._save_data()
+            self._store_airport(iata_code, airport_info)
             
             return location.get("timeZoneOffset")
         
@@ -115,22 +312,13 @@ class TimezoneManager:
         if not api_key:
             return None
         
-        client = anthropic.Anthropic(api_key=api_key)
+        if self._anthropic is None:
+            self._anthropic = anthropic.AsyncAnthropic(api_key=api_key)
+        client = self._anthropic
         
-        prompt = f"""空港コード「{iata_code}」のタイムゾーンオフセットを教えてください。
-
-回答は以下のJSON形式のみで返してください（他のテキストは含めないでください）：
-{{
-  "iata_code": "{iata_code}",
-  "city_name": "都市名",
-  "country_code": "国コード（2文字）",
-  "timezone_offset": "+09:00",
-  "timezone_name": "Asia/Tokyo"
-}}
-
-タイムゾーンオフセットは"+HH:MM"または"-HH:MM"の形式で返してください。"""
+        prompt = _CLAUDE_PROMPT_TEMPLATE.format(code=iata_code)
         
-        message = client.messages.create(
+        message = await client.messages.create(
             model="claude-haiku-4-5-20251001",
             max_tokens=1024,
             messages=[{"role": "user", "content": prompt}]
@@ -141,11 +329,10 @@ class TimezoneManager:
         # JSONをパース
         try:
             # コードブロックを除去
-            if response_text.startswith("```"):
-                lines = response_text.split("\n")
-                response_text = "\n".join(lines[1:-1]) if len(lines) > 2 else response_text
+            fence_match = FENCE_RE.match(response_text)
+            json_text = fence_match.group(1) if fence_match else response_text
             
-            result = json.loads(response_text)
+            result = json.loads(json_text)
             
             # キャッシュに保存
             airport_info = {
@@ -156,14 +343,10 @@ class TimezoneManager:
                 "timezone_offset": result.get("timezone_offset"),
                 "timezone_name": result.get("timezone_name"),
                 "source": "claude",
-                "updated_at": datetime.utcnow().isoformat() + "Z"
+                "updated_at": _utc_now_iso()
             }
             
-            if "airports" not in self.data:
-                self.data["airports"] = {}
-            
-            self.data["airports"][iata_code] = airport_info
-            self._save_data()
+            self._store_airport(iata_code, airport_info)
             
             return result.get("timezone_offset")
             
@@ -173,6 +356,7 @@ class TimezoneManager:
     
     def get_cached_timezone(self, iata_code: str) -> Optional[str]:
         """キャッシュからタイムゾーンオフセットを取得（非同期なし）"""
-        if iata_code in self.data.get("airports", {}):
-            return self.data["airports"][iata_code]["timezone_offset"]
+        airport = self._airports.get(iata_code)
+        if airport is not None:
+            return airport["timezone_offset"]
         return None